@@ -8,9 +8,43 @@ import logging
 import os
 import socket
 import struct
-import uuid
 import threading
 import re
+import math
+import operator
+import copy
+import collections
+
+try:
+    import orjson
+
+    def json_dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    def json_loads(data):
+        return orjson.loads(data)
+
+    _JSON_ERRORS = ValueError
+except ImportError:
+    try:
+        import msgspec
+
+        json_dumps = msgspec.json.encode
+        json_loads = msgspec.json.decode
+        _JSON_ERRORS = (ValueError, msgspec.DecodeError)
+    except ImportError:
+        def json_dumps(obj) -> bytes:
+            return json.dumps(obj, separators=(',', ':')).encode('utf-8')
+
+        def json_loads(data):
+            return json.loads(data)
+
+        _JSON_ERRORS = ValueError
+
+# Факториалы до 50000 имеют больше цифр, чем разрешает str(int) в Python 3.11+
+# (50000! - 213237 цифр), поэтому поднимаем лимит ровно до этого размера
+if hasattr(sys, "set_int_max_str_digits"):
+    sys.set_int_max_str_digits(220_000)
 
 OP_HANDSHAKE = 0
 OP_FRAME = 1
@@ -18,6 +52,9 @@ OP_CLOSE = 2
 OP_PING = 3
 OP_PONG = 4
 
+_HDR = struct.Struct("<II")
+_HEX_RE = re.compile(r'#(?:[0-9a-fA-F]{3}){1,2}')
+
 logger = logging.getLogger(__name__)
 
 
@@ -38,8 +75,21 @@ class DiscordIpcClient(metaclass=ABCMeta):
 
     def __init__(self, client_id):
         self.client_id = client_id
+        self._pid = os.getpid()
+        self._activity = None
+        self._activity_packet = None
+        self._nonce_offset = 0
+        # Everything in a SET_ACTIVITY packet up to the activity itself.
+        envelope = json_dumps({'cmd': 'SET_ACTIVITY', 'args': {'pid': self._pid, 'activity': None}})
+        self._activity_prefix = envelope[:-len(b'null}}')]
+        payload = json_dumps({'v': 1, 'client_id': client_id})
+        self._handshake_packet = _HDR.pack(OP_HANDSHAKE, len(payload)) + payload
         self._connect()
-        self._do_handshake()
+        try:
+            self._do_handshake()
+        except BaseException:
+            self._close()
+            raise
         logger.info("connected via ID %s", client_id)
 
     @classmethod
@@ -54,35 +104,57 @@ class DiscordIpcClient(metaclass=ABCMeta):
         pass
 
     def _do_handshake(self):
-        ret_op, ret_data = self.send_recv({'v': 1, 'client_id': self.client_id}, op=OP_HANDSHAKE)
+        self._write(self._handshake_packet)
+        ret_op, payload = self._recv_raw()
         # {'cmd': 'DISPATCH', 'data': {'v': 1, 'config': {...}}, 'evt': 'READY', 'nonce': None}
-        if ret_op == OP_FRAME and ret_data['cmd'] == 'DISPATCH' and ret_data['evt'] == 'READY':
+        # Check the expected reply on the raw bytes first and only
+        # decode the JSON when it doesn't look like READY.
+        if ret_op == OP_FRAME and b'"evt":"READY"' in payload and b'"cmd":"DISPATCH"' in payload:
+            return
+        try:
+            ret_data = json_loads(payload)
+        except _JSON_ERRORS as e:
+            raise DiscordIpcError(f"Invalid handshake reply: {e}") from e
+        logger.debug("received %s", ret_data)
+        if (ret_op == OP_FRAME and isinstance(ret_data, dict)
+                and ret_data.get('cmd') == 'DISPATCH' and ret_data.get('evt') == 'READY'):
             return
         else:
             if ret_op == OP_CLOSE:
-                self.close()
-            raise RuntimeError(ret_data)
+                self._close()
+            raise DiscordIpcError(ret_data)
 
     @abstractmethod
     def _write(self, date: bytes):
         pass
 
+    @abstractmethod
+    def _writev(self, buffers):
+        pass
+
     @abstractmethod
     def _recv(self, size: int) -> bytes:
         pass
 
+    def _recv_into(self, view: memoryview) -> int:
+        chunk = self._recv(len(view))
+        view[:len(chunk)] = chunk
+        return len(chunk)
+
     def _recv_header(self) -> (int, int):
-        header = self._recv_exactly(8)
-        return struct.unpack("<II", header)
+        header = self._recv_exactly(_HDR.size)
+        return _HDR.unpack(header)
 
     def _recv_exactly(self, size) -> bytes:
-        buf = b""
-        size_remaining = size
-        while size_remaining:
-            chunk = self._recv(size_remaining)
-            buf += chunk
-            size_remaining -= len(chunk)
-        return buf
+        buf = bytearray(size)
+        view = memoryview(buf)
+        offset = 0
+        while offset < size:
+            received = self._recv_into(view[offset:])
+            if not received:
+                raise DiscordIpcError("Connection closed by Discord")
+            offset += received
+        return bytes(buf)
 
     def close(self):
         logger.warning("closing connection")
@@ -107,31 +179,38 @@ class DiscordIpcClient(metaclass=ABCMeta):
 
     def send(self, data, op=OP_FRAME):
         logger.debug("sending %s", data)
-        data_str = json.dumps(data, separators=(',', ':'))
-        data_bytes = data_str.encode('utf-8')
-        header = struct.pack("<II", op, len(data_bytes))
-        self._write(header + data_bytes)
+        self._send_bytes(json_dumps(data), op)
+
+    def _send_bytes(self, data_bytes, op=OP_FRAME):
+        self._writev((_HDR.pack(op, len(data_bytes)), data_bytes))
 
     def recv(self) -> (int, "JSON"):
         """Receives a packet from discord.
 
         Returns op code and payload.
         """
-        op, length = self._recv_header()
-        payload = self._recv_exactly(length)
-        data = json.loads(payload.decode('utf-8'))
+        op, payload = self._recv_raw()
+        data = json_loads(payload)
         logger.debug("received %s", data)
         return op, data
 
+    def _recv_raw(self) -> (int, bytes):
+        op, length = self._recv_header()
+        return op, self._recv_exactly(length)
+
     def set_activity(self, act):
-        # act
-        data = {
-            'cmd': 'SET_ACTIVITY',
-            'args': {'pid': os.getpid(),
-                     'activity': act},
-            'nonce': str(uuid.uuid4())
-        }
-        self.send(data)
+        # The packet is a template: the activity is spliced into the
+        # cached envelope only when it changed, and each call just
+        # overwrites the nonce slot in place.
+        nonce = os.urandom(16).hex().encode('ascii')
+        if act != self._activity:
+            self._activity = copy.deepcopy(act)
+            logger.debug("sending activity %s", act)
+            head = self._activity_prefix + json_dumps(act) + b'},"nonce":"'
+            self._activity_packet = bytearray(head + nonce + b'"}')
+            self._nonce_offset = len(head)
+        self._activity_packet[self._nonce_offset:self._nonce_offset + len(nonce)] = nonce
+        self._send_bytes(self._activity_packet)
 
 
 class WinDiscordIpcClient(DiscordIpcClient):
@@ -142,23 +221,32 @@ class WinDiscordIpcClient(DiscordIpcClient):
         for i in range(10):
             path = self._pipe_pattern.format(i)
             try:
-                self._f = open(path, "w+b")
+                self._f = open(path, "r+b", buffering=0)
             except OSError as e:
-                logger.error("failed to open {!r}: {}".format(path, e))
+                logger.debug("failed to open {!r}: {}".format(path, e))
             else:
                 break
         else:
-            return DiscordIpcError("Failed to connect to Discord pipe")
+            raise DiscordIpcError("Failed to connect to Discord pipe")
 
         self.path = path
 
     def _write(self, data: bytes):
-        self._f.write(data)
-        self._f.flush()
+        # The pipe is unbuffered, so write() may accept only part of the data.
+        view = memoryview(data)
+        while view:
+            view = view[self._f.write(view):]
+
+    def _writev(self, buffers):
+        # Join the frame so it goes out in a single WriteFile call.
+        self._write(b"".join(buffers))
 
     def _recv(self, size: int) -> bytes:
         return self._f.read(size)
 
+    def _recv_into(self, view: memoryview) -> int:
+        return self._f.readinto(view)
+
     def _close(self):
         self._f.close()
 
@@ -176,11 +264,12 @@ class UnixDiscordIpcClient(DiscordIpcClient):
             try:
                 self._sock.connect(path)
             except OSError as e:
-                logger.error("failed to open {!r}: {}".format(path, e))
+                logger.debug("failed to open {!r}: {}".format(path, e))
             else:
                 break
         else:
-            return DiscordIpcError("Failed to connect to Discord pipe")
+            self._sock.close()
+            raise DiscordIpcError("Failed to connect to Discord pipe")
 
     @staticmethod
     def _get_pipe_pattern():
@@ -196,9 +285,22 @@ class UnixDiscordIpcClient(DiscordIpcClient):
     def _write(self, data: bytes):
         self._sock.sendall(data)
 
+    def _writev(self, buffers):
+        buffers = [memoryview(buffer) for buffer in buffers]
+        while buffers:
+            sent = self._sock.sendmsg(buffers)
+            while buffers and sent >= len(buffers[0]):
+                sent -= len(buffers[0])
+                buffers.pop(0)
+            if buffers:
+                buffers[0] = buffers[0][sent:]
+
     def _recv(self, size: int) -> bytes:
         return self._sock.recv(size)
 
+    def _recv_into(self, view: memoryview) -> int:
+        return self._sock.recv_into(view)
+
     def _close(self):
         self._sock.close()
 
@@ -235,773 +337,662 @@ activity = {
 }
 
 
+# Множители для перевода величин в наименьшую единицу (миллиметры и граммы)
+_TO_BASE = {
+    "Миллиметры": 1,
+    "Сантиметры": 10,
+    "Дециметры": 100,
+    "Метры": 1000,
+    "Километры": 1000000,
+    "Граммы": 1,
+    "Килограммы": 1000,
+    "Цейнтнеры": 100000,
+    "Тонны": 1000000
+}
+
+
+# Размерность каждой величины: длина или масса
+_DIM = {
+    "Миллиметры": "L",
+    "Сантиметры": "L",
+    "Дециметры": "L",
+    "Метры": "L",
+    "Километры": "L",
+    "Граммы": "M",
+    "Килограммы": "M",
+    "Цейнтнеры": "M",
+    "Тонны": "M"
+}
+
+
+# Последняя еще не отправленная активность: промежуточные состояния
+# перезаписываются, поток дискорд рпц отправляет только последнее
+_pending_details = collections.deque(maxlen=1)
+_rpc_cond = threading.Condition()
+
+
+# Действия калькулятора
+OPS = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    ":": operator.truediv
+}
+
+
+# Малые простые, их произведение и основания теста Миллера-Рабина
+_SMALL_PRIMES = (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41, 43, 47)
+_SMALL_PRIMORIAL = math.prod(_SMALL_PRIMES)
+_MR_BASES = (2, 325, 9375, 28178, 450775, 9780504, 1795265022)
+# Шаги колеса по модулю 30 (7, 11, 13, 17, 19, 23, 29, 31, 37, ...) и граница,
+# до которой пробное деление быстрее теста Миллера-Рабина
+_WHEEL_INC = (4, 2, 4, 2, 4, 6, 2, 6)
+_TRIAL_LIMIT = 1 << 18
+# Наибольшая длина числа для проверки на простоту и для поиска делителей
+# (перебор до корня из n: 14 цифр - около секунды, 20 - уже полчаса)
+_MAX_PRIME_DIGITS = 300
+_MAX_DIVIDER_DIGITS = 14
+
+
+# Кэш конфига: файл перечитывается только если изменилось время его модификации
+_cfg_cache = {"mtime": None, "data": None}
+
+
 def config_load():
-    with open("config.json", "r") as file:
-        data = json.load(file)
-    return data
+    mtime = os.stat("config.json").st_mtime_ns
+    if _cfg_cache["mtime"] != mtime:
+        with open("config.json", "rb") as file:
+            _cfg_cache["data"] = json_loads(file.read())
+        _cfg_cache["mtime"] = mtime
+    return _cfg_cache["data"]
 
 
 def is_correct_hex(hex):
-    check = re.search(r'^#(?:[0-9a-fA-F]{3}){1,2}$', hex)
-    if check:
-        return 1
-    else:
-        return 0
+    return _HEX_RE.fullmatch(hex) is not None
+
+
+def find_dividers(n, stop=None):
+    # Перебираем делители только до корня из n, парный делитель - n // i.
+    # Если выставлен stop, перебор прерывается (окно закрыли)
+    small = []
+    large = []
+    i = 1
+    while i * i <= n:
+        if not i & 0xFFFF and stop is not None and stop.is_set():
+            return []
+        if n % i == 0:
+            small.append(i)
+            if i != n // i:
+                large.append(n // i)
+        i += 1
+    return small + large[::-1]
+
+
+def is_prime(n):
+    # Отсев по общему делителю с произведением малых простых, затем тест
+    # Миллера-Рабина. Для n < 2**64 этот набор оснований дает точный ответ
+    if n < 2:
+        return False
+    if math.gcd(n, _SMALL_PRIMORIAL) != 1:
+        return n in _SMALL_PRIMES
+    if n < _TRIAL_LIMIT:
+        # Делители до 47 уже исключены, продолжаем колесо с 53
+        i = 53
+        k = 5
+        limit = math.isqrt(n)
+        while i <= limit:
+            if n % i == 0:
+                return False
+            i += _WHEEL_INC[k]
+            k = (k + 1) & 7
+        return True
+    d = n - 1
+    s = (d & -d).bit_length() - 1
+    d >>= s
+    bases = _MR_BASES if n < 1 << 64 else _MR_BASES + _SMALL_PRIMES
+    for a in bases:
+        a %= n
+        if a == 0:
+            continue
+        x = pow(a, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
 
 
 def close():
     sys.exit(0)
 
 
+def set_details(details):
+    with _rpc_cond:
+        _pending_details.append(details)
+        _rpc_cond.notify()
+
+
 def discord_rpc():
     global client_id
     client_id = '797139388513386546'
-    rpc_obj = DiscordIpcClient.for_platform(client_id)
-    print("RPC connection successful.")
-    time.sleep(5)
+    rpc_obj = None
+    failed = False
     while True:
-        rpc_obj.set_activity(activity)
-        time.sleep(5)
+        try:
+            if rpc_obj is None:
+                rpc_obj = DiscordIpcClient.for_platform(client_id)
+                print("RPC connection successful.")
+                time.sleep(5)
+            rpc_obj.set_activity(activity)
+            failed = False
+        except (OSError, DiscordIpcError) as e:
+            # Пока Discord не запущен, ошибка повторяется каждые 15 секунд,
+            # поэтому громко сообщаем только о первой
+            logger.log(logging.DEBUG if failed else logging.ERROR, "failed to update activity: %s", e)
+            failed = True
+            if rpc_obj is not None:
+                rpc_obj._close()
+            rpc_obj = None
+        # Ждем смены активности, но не дольше 15 секунд
+        with _rpc_cond:
+            _rpc_cond.wait_for(lambda: _pending_details, timeout=15)
+            if _pending_details:
+                activity["details"] = _pending_details.pop()
+
+
+def widget_styles(data):
+    # Параметры оформления виджетов, общие для всего окна
+    label_kw = {"bg": data["background_text"], "fg": data["foreground_text"]}
+    button_kw = {"bg": data["background_button"], "fg": data["foreground_button"]}
+    entry_kw = {"bg": data["background_entry"], "fg": data["foreground_text"]}
+    return label_kw, button_kw, entry_kw
+
+
+def build_input_window(title, geometry, fields, command):
+    # Окно с полями ввода, кнопкой "Ок!" и кнопкой закрытия
+    data = config_load()
+    label_kw, button_kw, entry_kw = widget_styles(data)
+
+    def close():
+        set_details("В главном меню")
+        window.destroy()
+
+    window = Toplevel(main_window)
+    window["bg"] = data["background_color"]
+    window.resizable(width=False, height=False)
+    window.title(title)
+    window.geometry(geometry)
+    warning = Label(window,
+                    text="ВНИМАНИЕ! Если вам нужно ввести десятичную дробь, то используйте ТОЧКУ для разделения целой и десятичной части!", **label_kw)
+    warning.grid(column=0, row=0)
+    entries = []
+    row = 1
+    for field in fields:
+        text = Label(window, text=field, **label_kw)
+        text.grid(column=0, row=row)
+        entry = Entry(window, width=10, **entry_kw)
+        entry.grid(column=0, row=row + 1)
+        entries.append(entry)
+        row += 2
+    ok_button = Button(window, text="Oк!", command=command, **button_kw)
+    ok_button.grid(column=0, row=row)
+    button_close = Button(window, text="Закрыть", command=close, **button_kw)
+    button_close.grid(column=0, row=row + 1)
+    return window, entries
+
+
+def build_dialog(parent, data, title, geometry):
+    # Окно для результата или ошибки создается один раз скрытым,
+    # а при каждом показе у него меняется только текст
+    dialog = Toplevel(parent)
+    dialog.withdraw()
+    dialog["bg"] = data["background_color"]
+    dialog.title(title)
+    dialog.geometry(geometry)
+    dialog.protocol("WM_DELETE_WINDOW", dialog.withdraw)
+    label = Label(dialog, text="", **widget_styles(data)[0])
+    label.grid(column=0, row=0)
+
+    def show(text):
+        label["text"] = text
+        dialog.deiconify()
+        dialog.lift()
+    return show
 
 
 def Perimetr():
-    activity["details"] = "Рассчитывает периметр"
+    set_details("Рассчитывает периметр")
     data = config_load()
 
     def perimeter_clicked():
         try:
-            float(shirina.get())
-            float(dlina.get())
+            sw = float(shirina.get())
+            dl = float(dlina.get())
         except ValueError:
-            error_window = Tk()
-            error_window["bg"] = data["background_color"]
-            error_window.title("Ошибка!")
-            error_window.geometry('400x250')
-            error = Label(error_window, text="Введите корректные данные!",
-                          bg=data["background_text"], fg=data["foreground_text"])
-            error.grid(column=0, row=0)
-            error_window.mainloop()
+            show_error("Введите корректные данные!")
         else:
-            if shirina.get() > dlina.get():  # If contradiction
-                error_window = Tk()
-                error_window["bg"] = data["background_color"]
-                error_window.title("Ошибка!")
-                error_window.geometry('400x250')
-                error = Label(error_window, text="Ошибка: ширина не может быть больше длины. Повторите попытку!", bg=data["background_text"], fg=data["foreground_text"])
-                error.grid(column=0, row=0)
-                error_window.mainloop()
-            elif shirina.get().isdigit() is False or dlina.get().isdigit() is False:
-                error_window = Tk()
-                error_window["bg"] = data["background_color"]
-                error_window.title("Ошибка!")
-                error_window.geometry('400x250')
-                error = Label(error_window, text="Введите корректные данные!",
-                              bg=data["background_text"], fg=data["foreground_text"])
-                error.grid(column=0, row=0)
-                error_window.mainloop()
-            elif shirina.get() < dlina.get() or shirina.get() == dlina.get():  # Getting perimeter
-                result_window = Tk()
-                result_window["bg"] = data["background_color"]
-                result_window.title("Результат")
-                result_window.geometry('250x150')
-                rezyltat_perimetr = float(dlina.get()) + float(shirina.get()) + float(dlina.get()) + float(shirina.get())
-                final = "Периметр равен " + str(rezyltat_perimetr)
-                result = Label(result_window, text=final, bg=data["background_text"], fg=data["foreground_text"])
-                result.grid(column=1, row=0)
-                result_window.mainloop()
+            if sw > dl:  # If contradiction
+                show_error("Ошибка: ширина не может быть больше длины. Повторите попытку!")
+            elif sw < 0 or dl < 0:
+                show_error("Введите корректные данные!")
+            else:  # Getting perimeter
+                rezyltat_perimetr = 2 * (sw + dl)
+                show_result(f"Периметр равен {rezyltat_perimetr}")
 
-    def clicked():
-        activity["details"] = "В главном меню"
-        perimeter_window.destroy()
-
-    perimeter_window = Tk()
-    perimeter_window["bg"] = data["background_color"]
-    perimeter_window.resizable(width=False, height=False)
-    perimeter_window.title("MathHelper - Периметр")
-    perimeter_window.geometry('832x300')
-    warning = Label(perimeter_window,
-                    text="ВНИМАНИЕ! Если вам нужно ввести десятичную дробь, то используйте ТОЧКУ для разделения целой и десятичной части!", bg=data["background_text"], fg=data["foreground_text"])
-    warning.grid(column=0, row=0)
-    text = Label(perimeter_window, text="Введите ширину", bg=data["background_text"], fg=data["foreground_text"])
-    text.grid(column=0, row=1)
-    shirina = Entry(perimeter_window, width=10, bg=data["background_entry"], fg=data["foreground_text"])
-    shirina.grid(column=0, row=2)
-    text1 = Label(perimeter_window, text="Введите длину", bg=data["background_text"], fg=data["foreground_text"])
-    text1.grid(column=0, row=3)
-    dlina = Entry(perimeter_window, width=10, bg=data["background_entry"], fg=data["foreground_text"])
-    dlina.grid(column=0, row=4)
-    ok_button = Button(perimeter_window, text="Oк!", command=perimeter_clicked, bg=data["background_button"], fg=data["foreground_button"])
-    ok_button.grid(column=0, row=5)
-    button_close = Button(perimeter_window, text="Закрыть", command=clicked, bg=data["background_button"], fg=data["foreground_button"])
-    button_close.grid(column=0, row=6)
-    perimeter_window.mainloop()
+    perimeter_window, (shirina, dlina) = build_input_window(
+        "MathHelper - Периметр", '832x300', ("Введите ширину", "Введите длину"), perimeter_clicked)
+    show_result = build_dialog(perimeter_window, data, "Результат", '250x150')
+    show_error = build_dialog(perimeter_window, data, "Ошибка!", '530x180')
 
 
 def Ploshad():
-    activity["details"] = "Рассчитывает площадь"
+    set_details("Рассчитывает площадь")
     data = config_load()
 
     def area_clicked():
         try:
-            float(shirina.get())
-            float(dlina.get())
+            sw = float(shirina.get())
+            dl = float(dlina.get())
         except ValueError:
-            error_window = Tk()
-            error_window["bg"] = data["background_color"]
-            error_window.title("Ошибка!")
-            error_window.geometry('400x250')
-            error = Label(error_window, text="Введите корректные данные!",
-                          bg=data["background_text"], fg=data["foreground_text"])
-            error.grid(column=0, row=0)
-            error_window.mainloop()
+            show_error("Введите корректные данные!")
         else:
-            result_window_area = Tk()
-            result_window_area["bg"] = data["background_color"]
-            rezyltat_ploshad = int(dlina.get()) * int(shirina.get())
-            result_window_area.title("Результат")
-            result_window_area.geometry('250x150')
-            final = "Площадь равна " + str(rezyltat_ploshad)
-            result = Label(result_window_area, text=final, bg=data["background_text"], fg=data["foreground_text"])
-            result.grid(column=1, row=0)
-            result_window_area.mainloop()
+            rezyltat_ploshad = dl * sw
+            show_result(f"Площадь равна {rezyltat_ploshad}")
 
-    def clicked():
-        activity["details"] = "В главном меню"
-        area_window.destroy()
-    area_window = Tk()
-    area_window["bg"] = data["background_color"]
-    area_window.resizable(width=False, height=False)
-    area_window.title("MathHelper - Площадь")
-    area_window.geometry('832x300')
-    warning = Label(area_window,
-                    text="ВНИМАНИЕ! Если вам нужно ввести десятичную дробь, то используйте ТОЧКУ для разделения целой и десятичной части!", bg=data["background_text"], fg=data["foreground_text"])
-    warning.grid(column=0, row=0)
-    text = Label(area_window, text="Введите ширину", bg=data["background_text"], fg=data["foreground_text"])
-    text.grid(column=0, row=1)
-    shirina = Entry(area_window, width=10, bg=data["background_entry"])
-    shirina.grid(column=0, row=2)
-    text1 = Label(area_window, text="Введите длину", bg=data["background_text"], fg=data["foreground_text"])
-    text1.grid(column=0, row=3)
-    dlina = Entry(area_window, width=10, bg=data["background_entry"])
-    dlina.grid(column=0, row=4)
-    ok_button = Button(area_window, text="Oк!", command=area_clicked, bg=data["background_button"], fg=data["foreground_button"])
-    ok_button.grid(column=0, row=5)
-    button_close = Button(area_window, text="Закрыть", command=clicked, bg=data["background_button"], fg=data["foreground_button"])
-    button_close.grid(column=0, row=6)
-    area_window.mainloop()
+    area_window, (shirina, dlina) = build_input_window(
+        "MathHelper - Площадь", '832x300', ("Введите ширину", "Введите длину"), area_clicked)
+    show_result = build_dialog(area_window, data, "Результат", '250x150')
+    show_error = build_dialog(area_window, data, "Ошибка!", '530x180')
 
 
 def Obyem():
-    activity["details"] = "Рассчитывает объем"
+    set_details("Рассчитывает объем")
     data = config_load()
 
     def void_clicked():
         try:
-            float(shirina.get())
-            float(dlina.get())
-            float(length.get())
+            sw = float(shirina.get())
+            dl = float(dlina.get())
+            h = float(length.get())
         except ValueError:
-            error_window = Tk()
-            error_window["bg"] = data["background_color"]
-            error_window.title("Ошибка!")
-            error_window.geometry('400x250')
-            error = Label(error_window, text="Введите корректные данные!",
-                          bg=data["background_text"], fg=data["foreground_text"])
-            error.grid(column=0, row=0)
-            error_window.mainloop()
+            show_error("Введите корректные данные!")
         else:
-            if float(shirina.get()) < 0 or float(dlina.get()) < 0 or float(length.get()) < 0:
-                error_window = Tk()
-                error_window["bg"] = data["background_color"]
-                error_window.title("Ошибка!")
-                error_window.geometry('400x250')
-                error = Label(error_window, text="Ошибка: значения не моут меньше нуля. Повторите попытку!", bg=data["background_text"], fg=data["foreground_text"])
-                error.grid(column=0, row=0)
-                error_window.mainloop()
+            if sw < 0 or dl < 0 or h < 0:
+                show_error("Ошибка: значения не моут меньше нуля. Повторите попытку!")
             else:
-                result_window = Tk()
-                result_window["bg"] = data["background_color"]
-                result_window.title("Результат")
-                result_window.geometry('250x150')
-                result = float(dlina.get()) * float(shirina.get()) * float(length.get())
-                final = "Объем равен " + str(result)
-                result = Label(result_window, text=final, bg=data["background_text"], fg=data["foreground_text"])
-                result.grid(column=1, row=0)
-                result_window.mainloop()
+                result = dl * sw * h
+                show_result(f"Объем равен {result}")
 
-    def clicked():
-        activity["details"] = "В главном меню"
-        void_window.destroy()
-    void_window = Tk()
-    void_window["bg"] = data["background_color"]
-    void_window.resizable(width=False, height=False)
-    void_window.title("MathHelper - Площадь")
-    void_window.geometry('832x300')
-    warning = Label(void_window,
-                    text="ВНИМАНИЕ! Если вам нужно ввести десятичную дробь, то используйте ТОЧКУ для разделения целой и десятичной части!", bg=data["background_text"], fg=data["foreground_text"])
-    warning.grid(column=0, row=0)
-    text = Label(void_window, text="Введите ширину", bg=data["background_text"], fg=data["foreground_text"])
-    text.grid(column=0, row=1)
-    shirina = Entry(void_window, width=10, bg=data["background_entry"])
-    shirina.grid(column=0, row=2)
-    text1 = Label(void_window, text="Введите длину", bg=data["background_text"], fg=data["foreground_text"])
-    text1.grid(column=0, row=3)
-    dlina = Entry(void_window, width=10, bg=data["background_entry"])
-    dlina.grid(column=0, row=4)
-    text2 = Label(void_window, text="Введите высоту", bg=data["background_text"], fg=data["foreground_text"])
-    text2.grid(column=0, row=5)
-    length = Entry(void_window, width=10, bg=data["background_entry"])
-    length.grid(column=0, row=6)
-    ok_button = Button(void_window, text="Oк!", command=void_clicked, bg=data["background_button"], fg=data["foreground_button"])
-    ok_button.grid(column=0, row=7)
-    button_close = Button(void_window, text="Закрыть", command=clicked, bg=data["background_button"], fg=data["foreground_button"])
-    button_close.grid(column=0, row=8)
-    void_window.mainloop()
+    void_window, (shirina, dlina, length) = build_input_window(
+        "MathHelper - Площадь", '832x300', ("Введите ширину", "Введите длину", "Введите высоту"), void_clicked)
+    show_result = build_dialog(void_window, data, "Результат", '250x150')
+    show_error = build_dialog(void_window, data, "Ошибка!", '530x180')
 
 
 def Konverter_velichin():
     def clicked():
         is_complete = True
         try:
-            float(data_value.get())
+            value = float(data_value.get())
         except ValueError:
-            error_window = Tk()
-            error_window["bg"] = data["background_color"]
-            error_window.title("Ошибка!")
-            error_window.geometry('400x250')
-            error = Label(error_window, text="Введите корректные данные!",
-                          bg=data["background_text"], fg=data["foreground_text"])
-            error.grid(column=0, row=0)
-            error_window.mainloop()
+            show_error("Введите корректные данные!")
         else:
-            if first_value.get() == "Сантиметры" and second_value.get() == "Сантиметры":
-                answer = float(data_value.get())
-            elif first_value.get() == "Метры" and second_value.get() == "Сантиметры":
-                answer = float(data_value.get()) * 100
-            elif first_value.get() == "Миллиметры" and second_value.get() == "Сантиметры":
-                answer = float(data_value.get()) / 10
-            elif first_value.get() == "Километры" and second_value.get() == "Сантиметры":
-                answer = float(data_value.get()) * 1000000
-            elif first_value.get() == "Дециметры" and second_value.get() == "Сантиметры":
-                answer = float(data_value.get()) * 10
-            elif first_value.get() == "Сантиметры" and second_value.get() == "Миллиметры":
-                answer = float(data_value.get()) * 10
-            elif first_value.get() == "Метры" and second_value.get() == "Миллиметры":
-                answer = float(data_value.get()) * 1000
-            elif first_value.get() == "Миллиметры" and second_value.get() == "Миллиметры":
-                answer = float(data_value.get())
-            elif first_value.get() == "Километры" and second_value.get() == "Миллиметры":
-                answer = float(data_value.get()) * 10000000
-            elif first_value.get() == "Дециметры" and second_value.get() == "Миллиметры":
-                answer = float(data_value.get()) * 100
-            elif first_value.get() == "Сантиметры" and second_value.get() == "Метры":
-                answer = float(data_value.get()) / 100
-            elif first_value.get() == "Метры" and second_value.get() == "Метры":
-                answer = float(data_value.get())
-            elif first_value.get() == "Миллиметры" and second_value.get() == "Метры":
-                answer = float(data_value.get()) / 1000
-            elif first_value.get() == "Километры" and second_value.get() == "Метры":
-                answer = float(data_value.get()) / 1000
-            elif first_value.get() == "Дециметры" and second_value.get() == "Метры":
-                answer = float(data_value.get()) / 10
-            elif first_value.get() == "Сантиметры" and second_value.get() == "Дециметры":
-                answer = float(data_value.get()) / 10
-            elif first_value.get() == "Метры" and second_value.get() == "Дециметры":
-                answer = float(data_value.get()) / 10
-            elif first_value.get() == "Миллиметры" and second_value.get() == "Дециметры":
-                answer = float(data_value.get()) / 10
-            elif first_value.get() == "Километры" and second_value.get() == "Дециметры":
-                answer = float(data_value.get()) / 10
-            elif first_value.get() == "Дециметры" and second_value.get() == "Дециметры":
-                answer = float(data_value.get())
-            elif first_value.get() == "Сантиметры" and second_value.get() == "Километры":  # kilometri
-                answer = float(data_value.get()) / 1000000
-            elif first_value.get() == "Метры" and second_value.get() == "Километры":
-                answer = float(data_value.get()) / 1000
-            elif first_value.get() == "Миллиметры" and second_value.get() == "Километры":
-                answer = float(data_value.get()) / 10000000
-            elif first_value.get() == "Километры" and second_value.get() == "Километры":
-                answer = float(data_value.get())
-            elif first_value.get() == "Дециметры" and second_value.get() == "Километры":
-                answer = float(data_value.get()) / 100
-            elif first_value.get() == "Граммы" and second_value.get() == "Граммы":
-                answer = float(data_value.get())
-            elif first_value.get() == "Граммы" and second_value.get() == "Килограммы":
-                answer = float(data_value.get()) / 1000
-            elif first_value.get() == "Граммы" and second_value.get() == "Цейнтнеры":
-                answer = float(data_value.get()) / 100000
-            elif first_value.get() == "Граммы" and second_value.get() == "Тонны":
-                answer = float(data_value.get()) / 1000000
-            elif first_value.get() == "Килограммы" and second_value.get() == "Граммы":
-                answer = float(data_value.get()) * 1000
-            elif first_value.get() == "Килограммы" and second_value.get() == "Килограммы":
-                answer = float(data_value.get())
-            elif first_value.get() == "Килограммы" and second_value.get() == "Цейнтнеры":
-                answer = float(data_value.get()) / 100
-            elif first_value.get() == "Килограммы" and second_value.get() == "Тонны":
-                answer = float(data_value.get()) / 1000
-            elif first_value.get() == "Цейнтнеры" and second_value.get() == "Граммы":
-                answer = float(data_value.get()) * 100000
-            elif first_value.get() == "Цейнтнеры" and second_value.get() == "Килограммы":
-                answer = float(data_value.get()) * 100
-            elif first_value.get() == "Цейнтнеры" and second_value.get() == "Цейнтнеры":
-                answer = float(data_value.get())
-            elif first_value.get() == "Цейнтнеры" and second_value.get() == "Тонны":
-                answer = float(data_value.get()) / 10
-            elif first_value.get() == "Тонны" and second_value.get() == "Граммы":
-                answer = float(data_value.get()) * 1000000
-            elif first_value.get() == "Тонны" and second_value.get() == "Килограммы":
-                answer = float(data_value.get()) * 1000
-            elif first_value.get() == "Тонны" and second_value.get() == "Цейнтнеры":
-                answer = float(data_value.get()) * 10
-            elif first_value.get() == "Тонны" and second_value.get() == "Тонны":
-                answer = float(data_value.get())
+            first = first_value.get()
+            second = second_value.get()
+            if first in _DIM and second in _DIM and _DIM[first] == _DIM[second]:
+                answer = value * _TO_BASE[first] / _TO_BASE[second]
             else:
                 is_complete = False
-            if is_complete is True:
-                result_window = Tk()
-                result_window["bg"] = data["background_color"]
-                result_window.title("Результат")
-                result_window.geometry('250x150')
-                result = float(answer)
-                final = "Результат конвертации: " + str(result)
-                result = Label(result_window, text=final, bg=data["background_text"], fg=data["foreground_text"])
-                result.grid(column=1, row=0)
-                result_window.mainloop()
+            if is_complete:
+                show_result(f"Результат конвертации: {answer}")
             else:
-                error_window = Tk()
-                error_window["bg"] = data["background_color"]
-                error_window.title("Ошибка!")
-                error_window.geometry('400x250')
-                error_window.resizable(height=False, width=False)
-                error = Label(error_window, text="Ошибка: невозможно конвертировать величины!",
-                              bg=data["background_text"], fg=data["foreground_text"])
-                error.grid(column=0, row=0)
-                error_window.mainloop()
+                show_error("Ошибка: невозможно конвертировать величины!")
 
     def close_window():
         root.destroy()
-        activity["details"] = "В главном меню"
-    activity["details"] = "Использует конвертер величин"
+        set_details("В главном меню")
+    set_details("Использует конвертер величин")
     data = config_load()
-    root = Tk()
+    label_kw, button_kw, entry_kw = widget_styles(data)
+    root = Toplevel(main_window)
     root.geometry('417x379')
     root.resizable(width=False, height=False)
     root.title("MathHelper - Конвертер величин")
-    warning = Label(root, text="При вводе дробного числа используйте ТОЧКУ для разделения!", bg=data["background_text"], fg=data["foreground_text"])
+    warning = Label(root, text="При вводе дробного числа используйте ТОЧКУ для разделения!", **label_kw)
     warning.grid(column=0, row=0)
-    from_convert = Label(root, text="Из чего переводим", bg=data["background_text"], fg=data["foreground_text"])
+    from_convert = Label(root, text="Из чего переводим", **label_kw)
     from_convert.grid(column=0, row=1)
     first_value = Combobox(root)
-    first_value['values'] = ("Миллиметры", "Сантиметры", "Дециметры", "Метры", "Километры", "Граммы", "Килограммы", "Цейнтнеры", "Тонны")
+    first_value['values'] = tuple(_TO_BASE)
     first_value.grid(column=0, row=2)
-    to_convert = Label(root, text="Во что переводим", bg=data["background_text"], fg=data["foreground_text"])
+    to_convert = Label(root, text="Во что переводим", **label_kw)
     to_convert.grid(column=0, row=3)
     second_value = Combobox(root)
-    second_value['values'] = ("Миллиметры", "Сантиметры", "Дециметры", "Метры", "Километры", "Граммы", "Килограммы", "Цейнтнеры", "Тонны")
+    second_value['values'] = tuple(_TO_BASE)
     second_value.grid(column=0, row=4)
-    value_text = Label(root, text="Значение величины", bg=data["background_text"], fg=data["foreground_text"])
+    value_text = Label(root, text="Значение величины", **label_kw)
     value_text.grid(column=0, row=5)
-    data_value = Entry(root, width=15)
+    data_value = Entry(root, width=15, **entry_kw)
     data_value.grid(column=0, row=6)
-    button = Button(root, text="Ок!", command=clicked, bg=data["background_button"], fg=data["foreground_button"])
+    button = Button(root, text="Ок!", command=clicked, **button_kw)
     button.grid(column=0, row=7)
-    close_button = Button(root, text="Закрыть", command=close_window, bg=data["background_button"], fg=data["foreground_button"])
+    close_button = Button(root, text="Закрыть", command=close_window, **button_kw)
     close_button.grid(column=0, row=8)
-    root.mainloop()
+    show_result = build_dialog(root, data, "Результат", '250x150')
+    show_error = build_dialog(root, data, "Ошибка!", '530x180')
 
 
 def number_of_digits():
-    activity["details"] = "Считает количество цифр в числе"
+    set_details("Считает количество цифр в числе")
     data = config_load()
+    label_kw, button_kw, entry_kw = widget_styles(data)
 
     def clicked():
-        if number.get().isdigit():
-            result = Tk()
-            result.title("Результат")
-            result.geometry('272x150')
-            final_text = "Вы ввели " + str(len(number.get())) + "- значное число."
-            text = Label(result, text=final_text, bg=data["background_text"], fg=data["foreground_text"])
-            text.grid(column=0, row=0)
-            result.mainloop()
-        else:
-            error = Tk()
-            error.title("Ошибка")
-            error.geometry('272x150')
-            txt = Label(error, text="Введите корректные данные!", bg=data["background_text"], fg=data["foreground_text"])
-            txt.grid(column=0, row=0)
-            error.mainloop()
+        s = number.get().strip()
+        if not s.isdigit() or (len(s) > 1 and s[0] == "0"):
+            show_error("Введите корректные данные!")
+            return
+        show_result(f"Вы ввели {len(s)}-значное число.")
 
     def close():
-        activity["details"] = "В главном меню"
+        set_details("В главном меню")
         window.destroy()
-    window = Tk()
+    window = Toplevel(main_window)
     window["bg"] = data["background_color"]
     window.resizable(width=False, height=False)
     window.title("MathHelper - Количество цифр в числе")
     window.geometry('530x180')
-    warning = Label(window, text="Для корректной работы программы введите целое и неотрицательное число!", bg=data["background_text"], fg=data["foreground_text"])
+    warning = Label(window, text="Для корректной работы программы введите целое и неотрицательное число!", **label_kw)
     warning.grid(column=0, row=0)
-    main_text = Label(window, text="Введите целое число", bg=data["background_text"], fg=data["foreground_text"])
+    main_text = Label(window, text="Введите целое число", **label_kw)
     main_text.grid(column=0, row=1)
-    number = Entry(window, width=10, bg=data["background_entry"])
+    number = Entry(window, width=10, **entry_kw)
     number.grid(column=0, row=2)
-    button = Button(window, text="Ок!", command=clicked, bg=data["background_button"], fg=data["foreground_button"])
+    button = Button(window, text="Ок!", command=clicked, **button_kw)
     button.grid(column=0, row=3)
-    button_close = Button(window, text="Закрыть", command=close, bg=data["background_button"], fg=data["foreground_button"])
+    button_close = Button(window, text="Закрыть", command=close, **button_kw)
     button_close.grid(column=0, row=4)
-    window.mainloop()
+    show_result = build_dialog(window, data, "Результат", '272x150')
+    show_error = build_dialog(window, data, "Ошибка!", '272x150')
 
 
 def get_dividers():
-    activity["details"] = "Смотрит делители числа"
+    set_details("Смотрит делители числа")
     data = config_load()
+    label_kw, button_kw, entry_kw = widget_styles(data)
 
     def clicked():
-        string = ""
+        nonlocal worker
+        if worker is not None and worker.is_alive():
+            show_error("Делители предыдущего числа еще считаются.")
+            return
+        s = number.get().strip()
+        if len(s) > _MAX_DIVIDER_DIGITS:
+            show_error(f"Введите число не длиннее {_MAX_DIVIDER_DIGITS} цифр!")
+            return
         try:
-            int(number.get())
+            n = int(s)
         except ValueError:
-            error_window = Tk()
-            error_window["bg"] = data["background_color"]
-            error_window.title("Ошибка!")
-            error_window.geometry('400x250')
-            error = Label(error_window, text="Введите корректные данные!",
-                          bg=data["background_text"], fg=data["foreground_text"])
-            error.grid(column=0, row=0)
-            error_window.mainloop()
+            show_error("Введите корректные данные!")
         else:
-            for i in range(1, int(number.get()) + 1):
-                if int(number.get()) % i == 0:
-                    temp = str(i) + ";"
-                    string += temp
-            result_window = Tk()
-            result_window.geometry('272x150')
-            result_window.title("Результат")
-            main_text = Label(result_window, text=string, bg=data["background_text"], fg=data["foreground_text"])
-            main_text.grid(column=0, row=0)
-            result_window.mainloop()
+            # Считаем в отдельном потоке, чтобы большие числа не вешали окно
+            dividers = []
+            worker = threading.Thread(target=lambda: dividers.extend(find_dividers(n, stop)), daemon=True)
+            worker.start()
+            wait_result(worker, dividers)
+
+    def wait_result(worker, dividers):
+        # Окно уже закрыли - останавливаем расчет, результат никому не нужен
+        if not root.winfo_exists():
+            stop.set()
+            return
+        if worker.is_alive():
+            root.after(50, wait_result, worker, dividers)
+            return
+        show_result("".join(f"{i};" for i in dividers))
 
     def closed():
-        activity["details"] = "В главном меню"
+        set_details("В главном меню")
         root.destroy()
 
-    root = Tk()
+    worker = None
+    stop = threading.Event()
+    root = Toplevel(main_window)
     root.title("MathHelper - Делители числа")
     root.resizable(width=False, height=False)
     root.geometry('530x180')
-    warning = Label(root, text="Для корректной работы программы введите целое и неотрицательное число!", bg=data["background_text"], fg=data["foreground_text"])
+    warning = Label(root, text="Для корректной работы программы введите целое и неотрицательное число!", **label_kw)
     warning.grid(column=0, row=0)
-    txt = Label(root, text="Введите целое число", bg=data["background_text"], fg=data["foreground_text"])
+    txt = Label(root, text="Введите целое число", **label_kw)
     txt.grid(column=0, row=1)
-    number = Entry(root, width=20, bg=data["background_entry"])
+    number = Entry(root, width=20, **entry_kw)
     number.grid(column=0, row=2)
-    button = Button(root, text="Ок!", command=clicked, bg=data["background_button"], fg=data["foreground_button"])
+    button = Button(root, text="Ок!", command=clicked, **button_kw)
     button.grid(column=0, row=3)
-    button_close = Button(root, text="Закрыть", command=closed, bg=data["background_button"],
-                          fg=data["foreground_button"])
+    button_close = Button(root, text="Закрыть", command=closed, **button_kw)
     button_close.grid(column=0, row=4)
-    root.mainloop()
+    show_result = build_dialog(root, data, "Результат", '272x150')
+    show_error = build_dialog(root, data, "Ошибка!", '530x180')
 
 
 def simple_number():
-    activity["details"] = "Проверяет число"
+    set_details("Проверяет число")
     data = config_load()
+    label_kw, button_kw, entry_kw = widget_styles(data)
 
     def clicked():
-        try:
-            int(number.get())
-        except ValueError:
-            error_window = Tk()
-            error_window["bg"] = data["background_color"]
-            error_window.title("Ошибка!")
-            error_window.geometry('400x250')
-            error = Label(error_window, text="Введите корректные данные!",
-                          bg=data["background_text"], fg=data["foreground_text"])
-            error.grid(column=0, row=0)
-            error_window.mainloop()
+        s = number.get().strip()
+        if not s.isdecimal() or len(s) > _MAX_PRIME_DIGITS:
+            show_error("Введите корректные данные!")
+            return
+        is_simple = is_prime(int(s))
+        if is_simple:
+            show_result("Введённое число - простое.")
         else:
-            is_simple = True
-            final_window = Tk()
-            final_window.title("Результат")
-            final_window.geometry('272x150')
-            for i in range(2, int(number.get())):
-                if int(number.get()) % i == 0:
-                    is_simple = False
-                    break
-            if is_simple is True:
-                final = Label(final_window, text="Введённое число - простое.", bg=data["background_text"], fg=data["foreground_text"])
-                final.grid(column=0, row=0)
-                final_window.mainloop()
-            elif is_simple is False:
-                final = Label(final_window, text="Введённое число не является простым.", bg=data["background_text"], fg=data["foreground_text"])
-                final.grid(column=0, row=0)
-                final_window.mainloop()
+            show_result("Введённое число не является простым.")
 
     def close():
-        activity["details"] = "В главном меню"
+        set_details("В главном меню")
         window.destroy()
-    window = Tk()
+    window = Toplevel(main_window)
     window["bg"] = data["background_color"]
     window.resizable(width=False, height=False)
     window.title("MathHelper - Простое число")
     window.geometry('530x180')
-    text = Label(window, text="Для корректной работы программы введите целое и неотрицательное число.", bg=data["background_text"], fg=data["foreground_text"])
+    text = Label(window, text="Для корректной работы программы введите целое и неотрицательное число.", **label_kw)
     text.grid(column=0, row=0)
-    txt = Label(window, text="Введите число", bg=data["background_text"], fg=data["foreground_text"])
+    txt = Label(window, text="Введите число", **label_kw)
     txt.grid(column=0, row=1)
-    number = Entry(window, width=10, bg=data["background_entry"])
+    number = Entry(window, width=10, **entry_kw)
     number.grid(column=0, row=2)
-    button = Button(window, text="Ок!", command=clicked, bg=data["background_button"], fg=data["foreground_button"])
+    button = Button(window, text="Ок!", command=clicked, **button_kw)
     button.grid(column=0, row=3)
-    button_close = Button(window, text="Закрыть", command=close, bg=data["background_button"], fg=data["foreground_button"])
+    button_close = Button(window, text="Закрыть", command=close, **button_kw)
     button_close.grid(column=0, row=4)
-    window.mainloop()
+    show_result = build_dialog(window, data, "Результат", '272x150')
+    show_error = build_dialog(window, data, "Ошибка!", '272x150')
 
 
 def calculator():
     def clicked():
-        is_complete = True
-        first_number = str("")
-        second_number = str("")
-        if expression.get().find("+") != -1:
-            sign_id = expression.get().find("+")
-            sign = "+"
-        elif expression.get().find("-") != -1:
-            sign_id = expression.get().find("-")
-            sign = "-"
-        elif expression.get().find("*") != -1:
-            sign_id = expression.get().find("*")
-            sign = "*"
-        elif expression.get().find(":") != -1:
-            sign_id = expression.get().find(":")
-            sign = ":"
-        else:
-            error_window = Tk()
-            is_complete = False
-            error_window.title("Ошибка!")
-            error_window.geometry('272x150')
-            warning = Label(error_window, text="Проверьте правильность введенных данных!", bg=data["background_text"], fg=data["foreground_text"])
-            warning.grid(column=0, row=0)
-            error_window.mainloop()
-        # First number (before sign) getting.
-        for i in range(0, sign_id):
-            first_number += expression.get()[i]
-        # Second number (after sign) getting.
-        for i in range(sign_id + 1, len(expression.get())):
-            second_number += expression.get()[i]
-        if sign == "+":
-            answer = str(first_number) + "+" + str(second_number) + "=" + str(float(first_number) + float(second_number))
-        elif sign == "-":
-            answer = str(first_number) + "-" + str(second_number) + "=" + str(float(first_number) - float(second_number))
-        elif sign == "*":
-            answer = str(first_number) + "*" + str(second_number) + "=" + str(float(first_number) * float(second_number))
-        elif sign == ":":
-            if second_number == 0:
-                error_window = Tk()
-                error_window.title("Ошибка!")
-                is_complete = False
-                error_window.geometry('272x150')
-                warning = Label(error_window, text="Проверьте правильность введенных данных!", bg=data["background_text"], fg=data["foreground_text"])
-                warning.grid(column=0, row=0)
-                error_window.mainloop()
-            else:
-                answer = str(first_number) + ":" + str(second_number) + "=" + str(float(first_number) / float(second_number))
-        if is_complete is True:
-            final_window = Tk()
-            final_window.title("Результат")
-            final_window.geometry('272x150')
-            text = "Ответ: " + str(answer)
-            main_text = Label(final_window, text=text, bg=data["background_text"], fg=data["foreground_text"])
-            main_text.grid(column=0, row=0)
-            final_window.mainloop()
+        s = expression.get()
+        # Первый по позиции знак действия, минус в начале относится к числу
+        signs = [(i, c) for c in OPS if (i := s.find(c, 1)) != -1]
+        if not signs:
+            show_error("Проверьте правильность введенных данных!")
+            return
+        sign_id, sign = min(signs)
+        first_number = s[:sign_id]
+        second_number = s[sign_id + 1:]
+        try:
+            a = float(first_number)
+            b = float(second_number)
+        except ValueError:
+            show_error("Проверьте правильность введенных данных!")
+            return
+        if sign == ":" and b == 0.0:
+            show_error("Проверьте правильность введенных данных!")
+            return
+        show_result(f"Ответ: {first_number}{sign}{second_number}={OPS[sign](a, b)}")
 
     def closed():
-        activity["details"] = "В главном меню"
+        set_details("В главном меню")
         root.destroy()
 
     data = config_load()
-    activity["details"] = "Использует калькулятор"
-    root = Tk()
+    label_kw, button_kw, entry_kw = widget_styles(data)
+    set_details("Использует калькулятор")
+    root = Toplevel(main_window)
     root["bg"] = data["background_color"]
     root.resizable(width=False, height=False)
     root.title("MathHelper - Калькулятор")
     main_text = "Для расчетов необходимо использовать следующие знаки:\n+ - сложение\n- - вычитание\n: - деление\n* - умножение\nВводите выражение с одним знаком действия БЕЗ пробелов. Пример: 2:2; 2+3"
-    l = Label(root, text=main_text, bg=data["background_text"], fg=data["foreground_text"])
+    l = Label(root, text=main_text, **label_kw)
     l.grid(column=0, row=0)
-    expression = Entry(root, width=20, bg=data["background_entry"])
+    expression = Entry(root, width=20, **entry_kw)
     expression.grid(column=0, row=1)
-    button = Button(root, text="Ок!", command=clicked, bg=data["background_button"], fg=data["foreground_button"])
+    button = Button(root, text="Ок!", command=clicked, **button_kw)
     button.grid(column=0, row=2)
-    button_close = Button(root, text="Закрыть", command=closed, bg=data["background_button"],
-                          fg=data["foreground_button"])
+    button_close = Button(root, text="Закрыть", command=closed, **button_kw)
     button_close.grid(column=0, row=3)
-    root.mainloop()
+    show_result = build_dialog(root, data, "Результат", '272x150')
+    show_error = build_dialog(root, data, "Ошибка!", '272x150')
 
 
 def picks_theorem():
-    activity["details"] = "Рассчитывает площадь по теореме Пика"
+    set_details("Рассчитывает площадь по теореме Пика")
     data = config_load()
+    label_kw, button_kw, entry_kw = widget_styles(data)
 
     def clicked():
-        if external.get().isdigit() and internal.get().isdigit():
-            result = Tk()
-            result["bg"] = data["background_color"]
-            result.title("Результат")
-            result.geometry('250x150')
-            area = float(int(internal.get()) + int(external.get()) / 2 - 1)
-            final_text = "Площадь равна " + str(area) + "ед."
-            text = Label(result, text=final_text, bg=data["background_text"], fg=data["foreground_text"])
-            text.grid(column=0, row=0)
-            result.mainloop()
+        ext_s = external.get().strip()
+        inn_s = internal.get().strip()
+        # Длина ограничена, чтобы int() не упирался в лимит цифр
+        if (ext_s.isdecimal() and inn_s.isdecimal()
+                and len(ext_s) <= 300 and len(inn_s) <= 300):
+            ext = int(ext_s)
+            inn = int(inn_s)
+            # Теорема Пика: S = В + Г / 2 - 1 = (2В + Г - 2) / 2, считаем в целых
+            num = 2 * inn + ext - 2
+            whole, half = divmod(abs(num), 2)
+            area = f"{'-' if num < 0 else ''}{whole}.{'5' if half else '0'}"
+            final_text = f"Площадь равна {area}ед."
+            show_result(final_text)
         else:
-            error = Tk()
-            error["bg"] = data["background_color"]
-            error.title("Ошибка")
-            error.geometry('272x150')
-            txt = Label(error, text="Введите корректные данные!", bg=data["background_text"], fg=data["foreground_text"])
-            txt.grid(column=0, row=0)
-            error.mainloop()
+            show_error("Введите корректные данные!")
 
     def close():
-        activity["details"] = "В главном меню"
+        set_details("В главном меню")
         window.destroy()
-    window = Tk()
+    window = Toplevel(main_window)
     window["bg"] = data["background_color"]
     window.resizable(width=False, height=False)
     window.title("MathHelper - Теорема Пика")
     window.geometry('535x180')
-    main_text = Label(window, text="Для корректной работы программы введите целые и неотрицательные числа!", bg=data["background_text"], fg=data["foreground_text"])
+    main_text = Label(window, text="Для корректной работы программы введите целые и неотрицательные числа!", **label_kw)
     main_text.grid(column=0, row=0)
-    external_text = Label(window, text="Количество внешних узлов", bg=data["background_text"], fg=data["foreground_text"])
+    external_text = Label(window, text="Количество внешних узлов", **label_kw)
     external_text.grid(column=0, row=1)
-    external = Entry(window, width=10, bg=data["background_entry"])
+    external = Entry(window, width=10, **entry_kw)
     external.grid(column=0, row=2)
-    internal_text = Label(window, text="Количество внутренних узлов", bg=data["background_text"], fg=data["foreground_text"])
+    internal_text = Label(window, text="Количество внутренних узлов", **label_kw)
     internal_text.grid(column=0, row=3)
-    internal = Entry(window, width=10, bg=data["background_entry"])
+    internal = Entry(window, width=10, **entry_kw)
     internal.grid(column=0, row=4)
-    button = Button(window, text="Ок!", command=clicked, bg=data["background_button"], fg=data["foreground_button"])
+    button = Button(window, text="Ок!", command=clicked, **button_kw)
     button.grid(column=0, row=5)
-    button_close = Button(window, text="Закрыть", command=close, bg=data["background_button"], fg=data["foreground_button"])
+    button_close = Button(window, text="Закрыть", command=close, **button_kw)
     button_close.grid(column=0, row=6)
-    window.mainloop()
+    show_result = build_dialog(window, data, "Результат", '250x150')
+    show_error = build_dialog(window, data, "Ошибка", '272x150')
 
 
 def factorial():
-    activity["details"] = "Рассчитывает факториал"
+    set_details("Рассчитывает факториал")
     data = config_load()
+    label_kw, button_kw, entry_kw = widget_styles(data)
 
     def factorial_clicked():
-        answer = 1
-        try:
-            int(number.get())
-        except ValueError:
-            error_window = Tk()
-            error_window["bg"] = data["background_color"]
-            error_window.title("Ошибка!")
-            error_window.geometry('400x250')
-            error = Label(error_window, text="Введите корректные данные!",
-                          bg=data["background_text"], fg=data["foreground_text"])
-            error.grid(column=0, row=0)
-            error_window.mainloop()
+        s = number.get().strip()
+        if not s.isdecimal():
+            show_error("Введите корректные данные!")
+            return
+        # Длинную строку не переводим в число: она заведомо больше 50000
+        n = int(s) if len(s.lstrip("0")) <= 5 else 50001
+        if n > 50000:
+            show_error("Введите число, меньшее 50000!")
+        elif n <= 0:
+            show_error("Введите число, большее 0!")
         else:
-            if int(number.get()) > 50000:
-                error_window = Tk()
-                error_window["bg"] = data["background_color"]
-                error_window.title("Ошибка")
-                error_window.geometry('530x180')
-                txt = Label(error_window, text="Введите число, меньшее 50000!", bg=data["background_text"], fg=data["foreground_text"])
-                txt.grid(column=0, row=0)
-                error_window.mainloop()
-            elif int(number.get()) <= 0:
-                error_window = Tk()
-                error_window["bg"] = data["background_color"]
-                error_window.title("Ошибка")
-                error_window.geometry('530x180')
-                txt = Label(error_window, text="Введите число, большее 0!", bg=data["background_text"], fg=data["foreground_text"])
-                txt.grid(column=0, row=0)
-                error_window.mainloop()
-            else:
-                for i in range(1, int(number.get()) + 1):
-                    answer = answer * i
-                result = Tk()
-                result.title("Результат")
-                result.geometry('250x150')
-                final_text = "Факториал числа " + str(number.get()) + " равен " + str(answer)
-                main_text = Label(result, text=final_text, bg=data["background_text"], fg=data["foreground_text"])
-                main_text.grid(column=0, row=0)
-                result.mainloop()
+            answer = math.factorial(n)
+            final_text = f"Факториал числа {n} равен {answer}"
+            show_result(final_text)
 
     def clicked():
-        activity["details"] = "В главном меню"
+        set_details("В главном меню")
         window.destroy()
-    window = Tk()
+    window = Toplevel(main_window)
     window["bg"] = data["background_color"]
     window.resizable(width=False, height=False)
     window.title("MathHelper - Факториал")
     window.geometry('530x180')
-    txt = Label(window, text="Для корректной работы программы введите целое и неотрицательное число.", bg=data["background_text"], fg=data["foreground_text"])
+    txt = Label(window, text="Для корректной работы программы введите целое и неотрицательное число.", **label_kw)
     txt.grid(column=0, row=0)
-    text = Label(window, text="Введите целое число", bg=data["background_text"], fg=data["foreground_text"])
+    text = Label(window, text="Введите целое число", **label_kw)
     text.grid(column=0, row=1)
-    number = Entry(window, width=10, bg=data["background_entry"])
+    number = Entry(window, width=10, **entry_kw)
     number.grid(column=0, row=2)
-    button = Button(window, text="Ок!", command=factorial_clicked, bg=data["background_button"], fg=data["foreground_button"])
+    button = Button(window, text="Ок!", command=factorial_clicked, **button_kw)
     button.grid(column=0, row=3)
-    button_close = Button(window, text="Закрыть", command=clicked, bg=data["background_button"], fg=data["foreground_button"])
+    button_close = Button(window, text="Закрыть", command=clicked, **button_kw)
     button_close.grid(column=0, row=4)
-    window.mainloop()
+    show_result = build_dialog(window, data, "Результат", '250x150')
+    show_error = build_dialog(window, data, "Ошибка", '530x180')
 
 
 def about():
-    activity["details"] = "В панели информации о программе"
+    set_details("В панели информации о программе")
     data = config_load()
+    label_kw, button_kw = widget_styles(data)[:2]
 
     def clicked():
-        activity["details"] = "В главном меню"
+        set_details("В главном меню")
         root.destroy()
-    root = Tk()
+    root = Toplevel(main_window)
     root["bg"] = data["background_color"]
     root.resizable(width=False, height=False)
     main_text = "Версия: v1.0\nРазработчик: DiOnFire\nИсходный код: github.com/DiOnFire/MathHelper\nНашли баг? https://github.com/DiOnFire/MathHelper/issues\n  "
     root.title("MathHelper - Информация")
-    title = Label(root, text="MathHelper", font=("Arial Black", 70), bg=data["background_text"], fg=data["foreground_text"])
+    title = Label(root, text="MathHelper", font=("Arial Black", 70), **label_kw)
     title.grid(column=0, row=0)
-    information = Label(root, text=main_text, bg=data["background_text"], fg=data["foreground_text"])
+    information = Label(root, text=main_text, **label_kw)
     information.grid(column=0, row=1)
-    button = Button(root, text="Закрыть", command=clicked, bg=data["background_button"], fg=data["foreground_button"])
+    button = Button(root, text="Закрыть", command=clicked, **button_kw)
     button.grid(column=0, row=2)
-    root.mainloop()
 
 
 def settings():
     data = config_load()
-    activity["details"] = "В меню настроек"
+    label_kw, button_kw, entry_kw = widget_styles(data)
+    set_details("В меню настроек")
 
     def save():
-        if is_correct_hex(background_text_entry.get()) == 1:
-            theme["background_text"] = background_text_entry.get()
-            with open("config.json", "w") as file:
-                json.dump(theme, file)
-        if is_correct_hex(background.get()) == 1:
-            theme["background_color"] = background.get()
-            with open("config.json", "w") as file:
-                json.dump(theme, file)
-        if is_correct_hex(foreground_text.get()) == 1:
-            theme["foreground_text"] = foreground_text.get()
-            with open("config.json", "w") as file:
-                json.dump(theme, file)
-        if is_correct_hex(foreground_button.get()) == 1:
-            theme["foreground_button"] = foreground_button.get()
-            with open("config.json", "w") as file:
-                json.dump(theme, file)
-        if is_correct_hex(background_button.get()) == 1:
-            theme["background_button"] = background_button.get()
-            with open("config.json", "w") as file:
-                json.dump(theme, file)
-        if is_correct_hex(background_entry.get()) == 1:
-            theme["background_entry"] = background_entry.get()
+        changed = False
+        for key, entry in (("background_color", background),
+                           ("background_text", background_text_entry),
+                           ("foreground_text", foreground_text),
+                           ("background_button", background_button),
+                           ("foreground_button", foreground_button),
+                           ("background_entry", background_entry)):
+            value = entry.get()
+            if is_correct_hex(value):
+                theme[key] = value
+                changed = True
+        if changed:
             with open("config.json", "w") as file:
                 json.dump(theme, file)
         root.destroy()
@@ -1012,98 +1003,98 @@ def settings():
         root.destroy()
 
     def closed():
-        activity["details"] = "В главном меню"
+        set_details("В главном меню")
         root.destroy()
-    root = Tk()
+    root = Toplevel(main_window)
     root["bg"] = data["background_color"]
     root.title("MathHelper - Настройки")
     root.geometry('279x410')
     root.resizable(width=False, height=False)
-    info = Label(root, text="Введите HEX-код цвета:", bg=data["background_text"], fg=data["foreground_text"])
+    info = Label(root, text="Введите HEX-код цвета:", **label_kw)
     info.grid(column=0, row=0)
-    background_text = Label(root, text="Пользовательский цвет Background", bg=data["background_text"], fg=data["foreground_text"])
+    background_text = Label(root, text="Пользовательский цвет Background", **label_kw)
     background_text.grid(column=0, row=1)
-    background = Entry(root, width=10, bg=data["background_entry"])
+    background = Entry(root, width=10, **entry_kw)
     background.grid(column=0, row=2)
-    background_text_text = Label(root, text="Пользовательский цвет Text Background", bg=data["background_text"], fg=data["foreground_text"])
+    background_text_text = Label(root, text="Пользовательский цвет Text Background", **label_kw)
     background_text_text.grid(column=0, row=3)
-    background_text_entry = Entry(root, width=10, bg=data["background_entry"])
+    background_text_entry = Entry(root, width=10, **entry_kw)
     background_text_entry.grid(column=0, row=4)
-    foreground_text_text = Label(root, text="Пользовательский цвет Text Foreground", bg=data["background_text"], fg=data["foreground_text"])
+    foreground_text_text = Label(root, text="Пользовательский цвет Text Foreground", **label_kw)
     foreground_text_text.grid(column=0, row=5)
-    foreground_text = Entry(root, width=10, bg=data["background_entry"])
+    foreground_text = Entry(root, width=10, **entry_kw)
     foreground_text.grid(column=0, row=6)
-    background_button_text = Label(root, text="Пользовательский цвет Button Background", bg=data["background_text"], fg=data["foreground_text"])
+    background_button_text = Label(root, text="Пользовательский цвет Button Background", **label_kw)
     background_button_text.grid(column=0, row=7)
-    background_button = Entry(root, width=10, bg=data["background_entry"])
+    background_button = Entry(root, width=10, **entry_kw)
     background_button.grid(column=0, row=8)
-    foreground_button_text = Label(root, text="Пользовательский цвет Button Foreground", bg=data["background_text"], fg=data["foreground_text"])
+    foreground_button_text = Label(root, text="Пользовательский цвет Button Foreground", **label_kw)
     foreground_button_text.grid(column=0, row=9)
-    foreground_button = Entry(root, width=10, bg=data["background_entry"])
+    foreground_button = Entry(root, width=10, **entry_kw)
     foreground_button.grid(column=0, row=10)
-    background_entry_text = Label(root, text="Пользовательский цвет Entry Background", bg=data["background_text"], fg=data["foreground_text"])
+    background_entry_text = Label(root, text="Пользовательский цвет Entry Background", **label_kw)
     background_entry_text.grid(column=0, row=11)
-    background_entry = Entry(root, width=10, bg=data["background_entry"])
+    background_entry = Entry(root, width=10, **entry_kw)
     background_entry.grid(column=0, row=12)
-    button = Button(root, text="Сохранить", command=save, bg=data["background_button"], fg=data["foreground_button"])
+    button = Button(root, text="Сохранить", command=save, **button_kw)
     button.grid(column=0, row=13)
-    default_button = Button(root, text="Сбросить настройки", command=return_defaults, bg=data["background_button"], fg=data["foreground_button"])
+    default_button = Button(root, text="Сбросить настройки", command=return_defaults, **button_kw)
     default_button.grid(column=0, row=14)
-    exit_button = Button(root, text="Выйти", command=closed, bg=data["background_button"], fg=data["foreground_button"])
+    exit_button = Button(root, text="Выйти", command=closed, **button_kw)
     exit_button.grid(column=0, row=15)
-    root.mainloop()
 
 
 def menu():
     # Создаем окно
     data = config_load()
-    root = Tk()
+    label_kw, button_kw = widget_styles(data)[:2]
+    root = main_window
     root["bg"] = data["background_color"]
     root.resizable(width=False, height=False)
     root.title("MathHelper")
     root.geometry('518x640')
     # Title text
-    title_text = Label(root, text="MathHelper", font=("Arial Bold", 50), bg=data["background_text"], fg=data["foreground_text"])
+    title_text = Label(root, text="MathHelper", font=("Arial Bold", 50), **label_kw)
     title_text.place(x=120, y=1)
     # Buttons
     # Perimeter
-    perimeter_button = Button(root, text="Расчет периметра", command=Perimetr, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    perimeter_button = Button(root, text="Расчет периметра", command=Perimetr, width=20, **button_kw)
     perimeter_button.place(x=45, y=64)
     # Area
-    area_button = Button(root, text="Расчет площади", command=Ploshad, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    area_button = Button(root, text="Расчет площади", command=Ploshad, width=20, **button_kw)
     area_button.place(x=276, y=64)
     # Void
-    void_button = Button(root, text="Расчет объема", command=Obyem, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    void_button = Button(root, text="Расчет объема", command=Obyem, width=20, **button_kw)
     void_button.place(x=45, y=114)
     # Converter
-    converter_button = Button(root, text="Конвертер величин", command=Konverter_velichin, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    converter_button = Button(root, text="Конвертер величин", command=Konverter_velichin, width=20, **button_kw)
     converter_button.place(x=276, y=114)
     # Number of digits (aka nod)
-    nod_button = Button(root, text="Количество цифр в числе", command=number_of_digits, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    nod_button = Button(root, text="Количество цифр в числе", command=number_of_digits, width=20, **button_kw)
     nod_button.place(x=276, y=164)
     # Dividers
-    dividers_button = Button(root, text="Делители числа", command=get_dividers, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    dividers_button = Button(root, text="Делители числа", command=get_dividers, width=20, **button_kw)
     dividers_button.place(x=45, y=214)
     # Is simple number
-    simple_button = Button(root, text="Простое число", command=simple_number, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    simple_button = Button(root, text="Простое число", command=simple_number, width=20, **button_kw)
     simple_button.place(x=276, y=214)
     # Calculator
-    calculator_button = Button(root, text="Калькулятор", command=calculator, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    calculator_button = Button(root, text="Калькулятор", command=calculator, width=20, **button_kw)
     calculator_button.place(x=45, y=264)
     # Picks theorem
-    picks_button = Button(root, text="Теорема Пика", command=picks_theorem, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    picks_button = Button(root, text="Теорема Пика", command=picks_theorem, width=20, **button_kw)
     picks_button.place(x=276, y=264)
     # Factorial
-    factorial_button = Button(root, text="Факториал", command=factorial, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    factorial_button = Button(root, text="Факториал", command=factorial, width=20, **button_kw)
     factorial_button.place(x=45, y=164)
     # About
-    about_button = Button(root, text="О программе", command=about, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    about_button = Button(root, text="О программе", command=about, width=20, **button_kw)
     about_button.place(x=169, y=560)
     # quit
-    quit_button = Button(root, text="Выйти", command=close, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    quit_button = Button(root, text="Выйти", command=close, width=20, **button_kw)
     quit_button.place(x=169, y=590)
     # settings
-    settings_button = Button(root, text="Настройки", command=settings, width=20, bg=data["background_button"], fg=data["foreground_button"])
+    settings_button = Button(root, text="Настройки", command=settings, width=20, **button_kw)
     settings_button.place(x=169, y=530)
     root.mainloop()
 
@@ -1111,4 +1102,6 @@ def menu():
 thread1 = threading.Thread(target=discord_rpc, daemon=True)
 thread1.start()
 theme = config_load()
+# Единственный экземпляр Tk: главное меню, остальные окна - его Toplevel
+main_window = Tk()
 menu()